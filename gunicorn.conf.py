@@ -0,0 +1,13 @@
+"""Gunicorn configuration for the traffic API.
+
+Run with: gunicorn -c gunicorn.conf.py wsgi:app
+
+(wsgi.py applies gevent's monkey patching before importing the app.)
+
+The endpoints are I/O-bound (status file reads, command file writes),
+so gevent coroutine workers let many requests share each worker.
+"""
+bind = '0.0.0.0:5000'
+workers = 4
+worker_class = 'gevent'
+worker_connections = 1000
@@ -1,67 +1,501 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify
+import functools
+import gzip
+import hashlib
+import mmap
 import os
 import json
+import queue
+import threading
 import time
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # fall back to stdlib json
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None  # fall back to per-request mtime checks
+
+try:
+    from gevent import get_hub as _gevent_get_hub, monkey as _gevent_monkey
+except ImportError:
+    _gevent_monkey = None
+
+# gevent only cooperatively schedules sockets, not disk I/O, so when the
+# app runs under patched gevent workers (wsgi.py) disk writes must go
+# through the hub's native thread pool or they stall every greenlet on
+# the worker. Patching happens before this module is imported.
+_USE_GEVENT_THREADPOOL = (_gevent_monkey is not None
+                          and _gevent_monkey.is_module_patched('socket'))
+
+def json_loads(data):
+    """Parse JSON bytes/str with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps_bytes(obj):
+    """Serialize to JSON bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
 app = Flask(__name__)
 
+if orjson is not None:
+    try:
+        from flask.json.provider import JSONProvider
+
+        class ORJSONProvider(JSONProvider):
+            """Route jsonify() through orjson for faster response encoding"""
+            def dumps(self, obj, **kwargs):
+                return orjson.dumps(obj).decode('utf-8')
+
+            def loads(self, s, **kwargs):
+                return orjson.loads(s)
+
+        app.json = ORJSONProvider(app)
+    except ImportError:
+        pass  # Flask < 2.2 has no pluggable JSON provider
+else:
+    # Keep the stdlib provider from re-sorting every payload's keys
+    try:
+        app.json.sort_keys = False
+    except AttributeError:
+        app.config['JSON_SORT_KEYS'] = False
+
 # Configuration
 STATUS_FILE_PATH = '/tmp/unity-traffic/status.json'
-COMMANDS_DIR = '/tmp/unity-traffic/commands'
+COMMANDS_LOG = '/tmp/unity-traffic/commands.ndjson'
 UNITY_OUTPUT_DIR = '/tmp/unity-traffic'
+UNITY_PROCESS_NAME = 'server.x86_64'
+
+# Accepted values for the write endpoints (frozensets: O(1) membership)
+VALID_STATUSES = frozenset(('green', 'yellow', 'red'))
+VALID_MODES = frozenset(('manual', 'automatic'))
+
+# Error bodies are constant strings: serialize them once. (Bytes, not
+# Response objects — Flask may mutate a Response, so each return wraps
+# the shared body in a fresh one via _error_response.)
+_ERR_MISSING_STATUS = json_dumps_bytes({"error": "Missing 'status' in request body"})
+_ERR_MISSING_MODE = json_dumps_bytes({"error": "Missing 'mode' in request body"})
+_ERR_INVALID_STATUS = json_dumps_bytes({"error": "Invalid status. Must be 'green', 'yellow', or 'red'"})
+_ERR_INVALID_MODE = json_dumps_bytes({"error": "Invalid mode. Must be 'manual' or 'automatic'"})
+_ERR_WRITE_FAILED = json_dumps_bytes({"error": "Failed to write command"})
+
+def _error_response(body, status):
+    """Wrap a pre-serialized error body in a Response"""
+    return Response(body, status=status, mimetype='application/json')
 
-# Ensure directories exist
-os.makedirs(COMMANDS_DIR, exist_ok=True)
+# Ensure the output directory exists
 os.makedirs(UNITY_OUTPUT_DIR, exist_ok=True)
 
+# Response timestamps are cached and refreshed at most every 0.25s, so
+# high-QPS bursts share one formatted string instead of allocating a
+# datetime + isoformat per request.
+_ts_cache = [0.0, '']
+
+def now_iso():
+    """ISO-format timestamp, refreshed at most every 0.25 seconds"""
+    t = time.time()
+    if t - _ts_cache[0] > 0.25:
+        _ts_cache[0] = t
+        _ts_cache[1] = datetime.fromtimestamp(t).isoformat()
+    return _ts_cache[1]
+
+# Parsed status cache, invalidated by the file's mtime. The dashboard polls
+# every 2 seconds, so most reads hit the cache instead of re-parsing JSON.
+_status_cache = {"mtime": None, "data": None, "ids": None, "blob": None,
+                 "prev_mtime": None, "delta_blob": None}
+_status_lock = threading.Lock()
+
+# Body for a delta poll that matched the current snapshot exactly
+_DELTA_EMPTY = b'{"changed": []}'
+
+# True while the inotify watcher owns cache invalidation; request
+# handlers then skip even the stat syscall and return the cached dict.
+_watcher_active = False
+
 def read_status_file():
-    """Read the current status from Unity's output file"""
+    """Read the current status from Unity's output file (cached)
+
+    While the inotify watcher owns invalidation this is a pure dict
+    read; otherwise it falls through to the stat-and-refresh path.
+    """
+    if _watcher_active:
+        with _status_lock:
+            if _status_cache["data"] is not None:
+                return _status_cache["data"]
+    return _refresh_status_cache()
+
+def _refresh_status_cache():
+    """Re-check the status file's mtime and re-parse it if it changed"""
     try:
-        if os.path.exists(STATUS_FILE_PATH):
-            with open(STATUS_FILE_PATH, 'r') as f:
-                return json.load(f)
+        mtime = os.stat(STATUS_FILE_PATH).st_mtime_ns
+    except FileNotFoundError:
         return {"error": "Status file not found", "lights": []}
     except Exception as e:
         return {"error": str(e), "lights": []}
 
+    with _status_lock:
+        if mtime == _status_cache["mtime"]:
+            return _status_cache["data"]
+        try:
+            # Parse straight out of a read-only mapping; skips copying
+            # the file through a userspace read buffer first.
+            fd = os.open(STATUS_FILE_PATH, os.O_RDONLY)
+            try:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    if orjson is not None:
+                        mv = memoryview(mm)
+                        try:
+                            data = orjson.loads(mv)
+                        finally:
+                            mv.release()
+                    else:
+                        data = json.loads(mm[:])  # stdlib json needs bytes
+            finally:
+                os.close(fd)
+        except Exception as e:
+            return {"error": str(e), "lights": []}
+        # Diff against the outgoing snapshot so ?since= polls only get
+        # the lights that actually changed (position etc. is static).
+        old = _status_cache["data"]
+        old_lights = {l.get("id"): l for l in old.get("lights", [])} if old else {}
+        changed = []
+        for light in data.get("lights", []):
+            prev = old_lights.get(light.get("id"))
+            if (prev is None or prev.get("status") != light.get("status")
+                    or prev.get("mode") != light.get("mode")):
+                changed.append({"id": light.get("id"),
+                                "status": light.get("status"),
+                                "mode": light.get("mode")})
+        _status_cache["prev_mtime"] = _status_cache["mtime"]
+        _status_cache["delta_blob"] = json_dumps_bytes({"changed": changed})
+        _status_cache["mtime"] = mtime
+        _status_cache["data"] = data
+        _status_cache["ids"] = [light.get("id") for light in data.get("lights", [])]
+        _status_cache["blob"] = blob = json_dumps_bytes(data)
+    _publish_status(blob)
+    return data
+
+# SSE subscribers; each connected stream gets refreshed status blobs
+# pushed onto its queue by _refresh_status_cache.
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+
+def _publish_status(blob):
+    """Fan a freshly serialized status payload out to SSE subscribers"""
+    with _subscribers_lock:
+        subs = list(_subscribers)
+    for q in subs:
+        try:
+            q.put_nowait(blob)
+        except queue.Full:
+            pass  # slow client; it will get the next update instead
+
+def get_light_ids():
+    """Get the cached list of traffic light IDs"""
+    read_status_file()
+    with _status_lock:
+        return _status_cache["ids"] or []
+
+def get_status_blob():
+    """Serialized status payload, cached alongside the parsed dict
+
+    Returns None when the status file is missing/unreadable (the error
+    dict is never cached), in which case callers fall back to jsonify.
+    """
+    status = read_status_file()
+    with _status_lock:
+        if _status_cache["data"] is status:
+            return _status_cache["blob"]
+    return None
+
+def _watch_status_file():
+    """Refresh the status cache on inotify events instead of request-time misses"""
+    global _watcher_active
+    try:
+        watcher = INotify()
+        watcher.add_watch(UNITY_OUTPUT_DIR,
+                          inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+    except OSError as e:
+        print(f"Status file watcher disabled: {e}")
+        return
+    status_name = os.path.basename(STATUS_FILE_PATH)
+    _watcher_active = True
+    try:
+        while True:
+            for event in watcher.read():
+                if event.name == status_name:
+                    _refresh_status_cache()
+    finally:
+        # if the watcher dies, requests go back to stat-based invalidation
+        _watcher_active = False
+
+if INotify is not None:
+    _refresh_status_cache()  # seed the cache before the first request
+    threading.Thread(target=_watch_status_file, daemon=True).start()
+
+def _wait_for_status_change(prev_mtime, timeout=0.2):
+    """Briefly poll for the status file to change after issuing a command
+
+    Lets mutating endpoints return the observed new state in the same
+    response instead of making the dashboard wait for its next update.
+    Returns False if Unity didn't rewrite the file within the window.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if os.stat(STATUS_FILE_PATH).st_mtime_ns != prev_mtime:
+                return True
+        except OSError:
+            return False
+        time.sleep(0.002)
+    return False
+
+def _current_status_mtime():
+    """mtime_ns of the status file, or None if it doesn't exist"""
+    try:
+        return os.stat(STATUS_FILE_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+# Unity process check cached for ~1s so dashboard polls don't rescan /proc.
+_proc_cache = {"ts": 0.0, "running": False}
+_proc_lock = threading.Lock()
+
+def is_unity_running():
+    """Check whether the Unity server process is alive (cached, no fork)"""
+    if time.monotonic() - _proc_cache["ts"] < 1.0:
+        return _proc_cache["running"]
+    with _proc_lock:
+        # another request may have refreshed while we waited for the lock
+        if time.monotonic() - _proc_cache["ts"] < 1.0:
+            return _proc_cache["running"]
+        return _scan_for_unity()
+
+def _scan_for_unity():
+    """Walk /proc once and refresh the cached result"""
+    running = False
+    try:
+        for entry in os.scandir('/proc'):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry.name}/comm', 'rb') as f:
+                    if f.read().rstrip() == UNITY_PROCESS_NAME.encode():
+                        running = True
+                        break
+            except OSError:
+                continue
+    except OSError:
+        pass  # no /proc (non-Linux); report not running
+    _proc_cache["running"] = running
+    _proc_cache["ts"] = time.monotonic()
+    return running
+
+# Commands are newline-delimited JSON appended to one log that Unity
+# tails, so issuing a command is a single O_APPEND write — no per-command
+# inode allocation or directory scanning. The handle is opened once and
+# unbuffered so each command is one complete write.
+_commands_log_lock = threading.Lock()
+_commands_log = None
+
+def _commands_log_handle():
+    global _commands_log
+    if _commands_log is None:
+        _commands_log = open(COMMANDS_LOG, 'ab', buffering=0)
+    return _commands_log
+
+# Skeletons for the fixed-shape commands; handlers copy and stamp a
+# timestamp instead of rebuilding the same dict every request.
+_CMD_EMERGENCY_STOP = {"type": "emergency_stop", "status": "red"}
+_CMD_CLEAR_ALL = {"type": "clear_all", "status": "green"}
+_CMD_RANDOMIZE = {"type": "randomize"}
+_CMD_RESTORE = {"type": "restore_normal"}
+
+def _stamped(skeleton):
+    """Copy a command skeleton and add the current timestamp"""
+    command = skeleton.copy()
+    command["timestamp"] = now_iso()
+    return command
+
+def _append_to_log(payload):
+    """Locked single write to the command log, yielding under gevent"""
+    with _commands_log_lock:
+        write = _commands_log_handle().write
+        if _USE_GEVENT_THREADPOOL:
+            # run the blocking write in a native thread; the calling
+            # greenlet yields until it completes
+            _gevent_get_hub().threadpool.apply(write, (payload,))
+        else:
+            write(payload)
+
 def write_command(command_data):
-    """Write a command file for Unity to process"""
+    """Append a command to the shared log for Unity to process"""
     try:
-        timestamp = int(time.time() * 1000)
-        command_file = os.path.join(COMMANDS_DIR, f'command_{timestamp}.json')
-        with open(command_file, 'w') as f:
-            json.dump(command_data, f)
+        _append_to_log(json_dumps_bytes(command_data) + b'\n')
         return True
     except Exception as e:
         print(f"Error writing command: {e}")
         return False
 
+def cached_endpoint(ttl=1.0):
+    """Cache a GET handler's rendered 200 response for a short TTL
+
+    Keyed on the route path only — none of the decorated endpoints read
+    query args, and keying on the full path would let cache-buster query
+    strings grow the cache without bound. Concurrent misses are
+    deduplicated: the first request renders while the rest wait on an
+    Event and then serve the cached bytes, so N simultaneous dashboard
+    polls collapse to one file read. Error responses are never cached.
+    Responses carry X-Cache: HIT/MISS.
+    """
+    cache = {}
+    in_flight = {}
+    lock = threading.Lock()
+
+    def _cached_response(entry):
+        body, status, ctype = entry[1]
+        resp = Response(body, status=status, content_type=ctype)
+        resp.headers['X-Cache'] = 'HIT'
+        return resp
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = request.path
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and time.monotonic() - entry[0] < ttl:
+                    return _cached_response(entry)
+                waiter = in_flight.get(key)
+                if waiter is None:
+                    waiter = in_flight[key] = threading.Event()
+                    is_renderer = True
+                else:
+                    is_renderer = False
+
+            if not is_renderer:
+                waiter.wait(timeout=ttl)
+                with lock:
+                    entry = cache.get(key)
+                if entry is not None:
+                    return _cached_response(entry)
+                return fn(*args, **kwargs)  # renderer failed; render ourselves
+
+            try:
+                rv = app.make_response(fn(*args, **kwargs))
+                if rv.status_code == 200:
+                    with lock:
+                        cache[key] = (time.monotonic(),
+                                      (rv.get_data(), rv.status_code, rv.content_type))
+                    rv.headers['X-Cache'] = 'MISS'
+                return rv
+            finally:
+                with lock:
+                    in_flight.pop(key, None)
+                waiter.set()
+        return wrapper
+    return decorator
+
 @app.route('/api/status', methods=['GET'])
+@cached_endpoint(ttl=1.0)
 def get_status():
     """Get overall system status"""
     status = read_status_file()
     
     return jsonify({
         "status": "running" if not status.get("error") else "error",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "total_lights": len(status.get("lights", [])),
         "server": "ronin",
+        "unity_running": is_unity_running(),
         "data": status
     })
 
 @app.route('/api/traffic/lights', methods=['GET'])
 def get_traffic_lights():
-    """Get all traffic lights status"""
-    status = read_status_file()
-    return jsonify(status)
+    """Get all traffic lights status
+
+    Pass ?since=<mtime> (from the X-Status-Mtime header of a previous
+    response) to get only the lights whose status/mode changed instead
+    of the full array.
+    """
+    since = request.args.get('since', type=int)
+    blob = get_status_blob()
+    if blob is None:
+        return jsonify(read_status_file())
+
+    with _status_lock:
+        mtime = _status_cache["mtime"]
+        if since is not None:
+            if since == mtime:
+                blob = _DELTA_EMPTY
+            elif since == _status_cache["prev_mtime"] and _status_cache["delta_blob"] is not None:
+                blob = _status_cache["delta_blob"]
+            # older clients fall through to the full payload
+    return Response(blob, mimetype='application/json',
+                    headers={'X-Status-Mtime': str(mtime)})
+
+@app.route('/api/traffic/lights/stream', methods=['GET'])
+def stream_traffic_lights():
+    """Push traffic light status via Server-Sent Events on file change
+
+    With the inotify watcher running this is fully event-driven: the
+    watcher's refresh publishes to each subscriber's queue and no client
+    ever stats the file. Without it, fall back to polling the mtime.
+    """
+    def generate():
+        if _watcher_active:
+            # Subscribe before taking the snapshot: an update landing in
+            # between is then queued (worst case a duplicate push) rather
+            # than silently dropped until the next file change.
+            q = queue.Queue(maxsize=4)
+            with _subscribers_lock:
+                _subscribers.add(q)
+            try:
+                blob = get_status_blob()
+                if blob is not None:
+                    yield f"data: {blob.decode('utf-8')}\n\n"
+                while True:
+                    try:
+                        payload = q.get(timeout=15.0)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"  # surfaces dead clients too
+                        continue
+                    yield f"data: {payload.decode('utf-8')}\n\n"
+            finally:
+                with _subscribers_lock:
+                    _subscribers.discard(q)
+        else:
+            # Same ordering concern: record the mtime before snapshotting
+            # so a change in between shows up as different on the first poll.
+            last_mtime = _current_status_mtime()
+            blob = get_status_blob()
+            if blob is not None:
+                yield f"data: {blob.decode('utf-8')}\n\n"
+            while True:
+                time.sleep(0.25)
+                mtime = _current_status_mtime()
+                if mtime is not None and mtime != last_mtime:
+                    last_mtime = mtime
+                    blob = get_status_blob()
+                    if blob is None:
+                        blob = json_dumps_bytes(read_status_file())
+                    yield f"data: {blob.decode('utf-8')}\n\n"
+    return Response(generate(), mimetype='text/event-stream')
 
 @app.route('/api/traffic/lights/list', methods=['GET'])
+@cached_endpoint(ttl=1.0)
 def get_traffic_lights_list():
     """Get list of traffic light IDs only"""
-    status = read_status_file()
-    lights = status.get("lights", [])
-    light_ids = [light.get("id") for light in lights]
+    light_ids = get_light_ids()
     return jsonify({
         "count": len(light_ids),
         "light_ids": light_ids
@@ -70,20 +504,20 @@ def get_traffic_lights_list():
 @app.route('/api/traffic/lights/<light_id>/set', methods=['POST'])
 def set_traffic_light(light_id):
     """Set a specific traffic light status"""
-    data = request.get_json()
-    
+    data = request.get_json(silent=True)
+
     if not data or 'status' not in data:
-        return jsonify({"error": "Missing 'status' in request body"}), 400
-    
+        return _error_response(_ERR_MISSING_STATUS, 400)
+
     status = data['status'].lower()
-    if status not in ['green', 'yellow', 'red']:
-        return jsonify({"error": "Invalid status. Must be 'green', 'yellow', or 'red'"}), 400
+    if status not in VALID_STATUSES:
+        return _error_response(_ERR_INVALID_STATUS, 400)
     
     command = {
         "type": "set_light",
         "light_id": light_id,
         "status": status,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
     
     if write_command(command):
@@ -94,25 +528,25 @@ def set_traffic_light(light_id):
             "message": f"Traffic light {light_id} set to {status}"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/lights/<light_id>/mode', methods=['POST'])
 def set_traffic_light_mode(light_id):
     """Set traffic light control mode (manual/automatic)"""
-    data = request.get_json()
-    
+    data = request.get_json(silent=True)
+
     if not data or 'mode' not in data:
-        return jsonify({"error": "Missing 'mode' in request body"}), 400
-    
+        return _error_response(_ERR_MISSING_MODE, 400)
+
     mode = data['mode'].lower()
-    if mode not in ['manual', 'automatic']:
-        return jsonify({"error": "Invalid mode. Must be 'manual' or 'automatic'"}), 400
+    if mode not in VALID_MODES:
+        return _error_response(_ERR_INVALID_MODE, 400)
     
     command = {
         "type": "set_mode",
         "light_id": light_id,
         "mode": mode,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
     
     if write_command(command):
@@ -123,24 +557,24 @@ def set_traffic_light_mode(light_id):
             "message": f"Traffic light {light_id} mode set to {mode}"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/lights/bulk/mode', methods=['POST'])
 def set_all_lights_mode():
     """Set all traffic lights to manual or automatic mode"""
-    data = request.get_json()
-    
+    data = request.get_json(silent=True)
+
     if not data or 'mode' not in data:
-        return jsonify({"error": "Missing 'mode' in request body"}), 400
-    
+        return _error_response(_ERR_MISSING_MODE, 400)
+
     mode = data['mode'].lower()
-    if mode not in ['manual', 'automatic']:
-        return jsonify({"error": "Invalid mode. Must be 'manual' or 'automatic'"}), 400
+    if mode not in VALID_MODES:
+        return _error_response(_ERR_INVALID_MODE, 400)
     
     command = {
         "type": "set_all_modes",
         "mode": mode,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
     
     if write_command(command):
@@ -150,57 +584,40 @@ def set_all_lights_mode():
             "message": f"All traffic lights set to {mode} mode"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/lights/set_all_red', methods=['POST'])
 def set_all_red():
     """Emergency: Set all traffic lights to red"""
-    command = {
-        "type": "emergency_stop",
-        "status": "red",
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    if write_command(command):
+    if write_command(_stamped(_CMD_EMERGENCY_STOP)):
         return jsonify({
             "success": True,
             "message": "Emergency stop activated - all lights set to red"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/lights/set_all_green', methods=['POST'])
 def set_all_green():
     """Clear all intersections: Set all traffic lights to green"""
-    command = {
-        "type": "clear_all",
-        "status": "green",
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    if write_command(command):
+    if write_command(_stamped(_CMD_CLEAR_ALL)):
         return jsonify({
             "success": True,
             "message": "All intersections cleared - all lights set to green"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/lights/randomize', methods=['POST'])
 def randomize_lights():
     """System test: Randomize all traffic light states"""
-    command = {
-        "type": "randomize",
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    if write_command(command):
+    if write_command(_stamped(_CMD_RANDOMIZE)):
         return jsonify({
             "success": True,
             "message": "Traffic lights randomized for system test"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/attack/chaos', methods=['POST'])
 def simulate_attack():
@@ -213,36 +630,40 @@ def simulate_attack():
         "type": "attack_simulation",
         "attack_type": attack_type,
         "duration": duration,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
-    
+
+    prev_mtime = _current_status_mtime()
     if write_command(command):
+        applied = _wait_for_status_change(prev_mtime)
         return jsonify({
             "success": True,
             "attack_type": attack_type,
             "duration": duration,
+            "applied": applied,
+            "lights": read_status_file().get("lights", []),
             "message": f"Cyber attack simulation started: {attack_type} for {duration} seconds"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/traffic/restore', methods=['POST'])
 def restore_system():
     """Restore all traffic lights to automatic normal operation"""
-    command = {
-        "type": "restore_normal",
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    if write_command(command):
+    prev_mtime = _current_status_mtime()
+    if write_command(_stamped(_CMD_RESTORE)):
+        applied = _wait_for_status_change(prev_mtime)
         return jsonify({
             "success": True,
+            "applied": applied,
+            "lights": read_status_file().get("lights", []),
             "message": "System restored to normal automatic operation"
         })
     else:
-        return jsonify({"error": "Failed to write command"}), 500
+        return _error_response(_ERR_WRITE_FAILED, 500)
 
 @app.route('/api/vehicles', methods=['GET'])
+@cached_endpoint(ttl=1.0)
 def get_vehicles():
     """Get all vehicle positions and states"""
     try:
@@ -250,260 +671,137 @@ def get_vehicles():
         vehicles_file = os.path.join(UNITY_OUTPUT_DIR, 'vehicles.json')
         
         if os.path.exists(vehicles_file):
-            with open(vehicles_file, 'r') as f:
-                vehicles_data = json.load(f)
+            with open(vehicles_file, 'rb') as f:
+                vehicles_data = json_loads(f.read())
             return jsonify(vehicles_data)
         else:
             return jsonify({"vehicles": []})
     except Exception as e:
         return jsonify({"error": str(e), "vehicles": []}), 500
 
+# The dashboard page lives in static/ as the single source of truth;
+# it is read once at import and served from the gzip cache below.
+_DASHBOARD_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'static', 'dashboard.html')
+with open(_DASHBOARD_FILE, 'r', encoding='utf-8') as _f:
+    DASHBOARD_HTML = _f.read()
+
+def _minify_html(html):
+    """Strip indentation, blank lines and JS line comments from the page
+
+    Newlines are kept so the inline <script> (which uses // comments)
+    stays valid; dropping the leading whitespace alone shrinks the
+    payload by roughly a third before gzip.
+    """
+    lines = []
+    for line in html.split('\n'):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines)
+
+# The dashboard has no template variables, so render it once at import:
+# minify, keep both the plain and gzipped buffers, and negotiate per
+# client on Accept-Encoding.
+_DASHBOARD_MIN = _minify_html(DASHBOARD_HTML).encode('utf-8')
+_DASHBOARD_GZ = gzip.compress(_DASHBOARD_MIN, compresslevel=6)
+_DASHBOARD_ETAG = hashlib.md5(_DASHBOARD_MIN).hexdigest()
+
 @app.route('/dashboard')
 def dashboard():
-    """Web-based control dashboard"""
-    dashboard_html = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Traffic System Control Dashboard</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            margin: 20px;
-            background-color: #1a1a1a;
-            color: #fff;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        h1 {
-            color: #4CAF50;
-            border-bottom: 2px solid #4CAF50;
-            padding-bottom: 10px;
-        }
-        .status {
-            background-color: #2d2d2d;
-            padding: 20px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-        }
-        .controls {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        button {
-            padding: 15px;
-            font-size: 16px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-        .btn-green {
-            background-color: #4CAF50;
-            color: white;
-        }
-        .btn-red {
-            background-color: #f44336;
-            color: white;
-        }
-        .btn-yellow {
-            background-color: #ff9800;
-            color: white;
-        }
-        .btn-blue {
-            background-color: #2196F3;
-            color: white;
-        }
-        button:hover {
-            opacity: 0.8;
-            transform: scale(1.05);
-        }
-        .light-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
-            gap: 10px;
-        }
-        .light-item {
-            background-color: #2d2d2d;
-            padding: 10px;
-            border-radius: 5px;
-            text-align: center;
-        }
-        .light-status {
-            width: 30px;
-            height: 30px;
-            border-radius: 50%;
-            margin: 10px auto;
-        }
-        .status-green { background-color: #4CAF50; }
-        .status-yellow { background-color: #ff9800; }
-        .status-red { background-color: #f44336; }
-        .mode-badge {
-            display: inline-block;
-            padding: 3px 8px;
-            border-radius: 3px;
-            font-size: 12px;
-            margin-top: 5px;
-        }
-        .mode-auto { background-color: #2196F3; }
-        .mode-manual { background-color: #9C27B0; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🚦 Traffic System Control Dashboard</h1>
-        
-        <div class="status">
-            <h2>System Status</h2>
-            <p>Server: <strong>Ronin</strong></p>
-            <p>Total Lights: <strong id="total-lights">-</strong></p>
-            <p>Last Update: <strong id="last-update">-</strong></p>
-        </div>
-
-        <h2>System Controls</h2>
-        <div class="controls">
-            <button class="btn-red" onclick="emergencyStop()">🛑 Emergency Stop (All Red)</button>
-            <button class="btn-green" onclick="clearAll()">✅ Clear All (All Green)</button>
-            <button class="btn-yellow" onclick="randomize()">🎲 Randomize (Test)</button>
-            <button class="btn-blue" onclick="restore()">🔄 Restore Normal</button>
-        </div>
-
-        <h2>Traffic Lights</h2>
-        <div id="lights-grid" class="light-grid">
-            <p>Loading...</p>
-        </div>
-    </div>
-
-    <script>
-        async function updateStatus() {
-            try {
-                const response = await fetch('/api/traffic/lights');
-                const data = await response.json();
-                
-                document.getElementById('total-lights').textContent = data.lights ? data.lights.length : 0;
-                document.getElementById('last-update').textContent = new Date().toLocaleTimeString();
-                
-                // Update lights grid
-                const grid = document.getElementById('lights-grid');
-                if (data.lights && data.lights.length > 0) {
-                    grid.innerHTML = data.lights.map(light => `
-                        <div class="light-item">
-                            <strong>${light.id}</strong>
-                            <div class="light-status status-${light.status}"></div>
-                            <div>${light.status.toUpperCase()}</div>
-                            <div class="mode-badge mode-${light.mode}">${light.mode}</div>
-                        </div>
-                    `).join('');
-                }
-            } catch (error) {
-                console.error('Error updating status:', error);
-            }
-        }
-
-        async function emergencyStop() {
-            try {
-                const response = await fetch('/api/traffic/lights/set_all_red', { method: 'POST' });
-                const data = await response.json();
-                if (data.success) {
-                    alert('Emergency stop activated!');
-                    setTimeout(updateStatus, 1000);
-                } else {
-                    alert('Emergency stop failed: ' + data.error);
-                }
-            } catch (error) {
-                alert('Connection error: ' + error.message);
-            }
-        }
-
-        async function clearAll() {
-            try {
-                const response = await fetch('/api/traffic/lights/set_all_green', { method: 'POST' });
-                const data = await response.json();
-                if (data.success) {
-                    alert('All intersections cleared!');
-                    setTimeout(updateStatus, 1000);
-                } else {
-                    alert('Clear all failed: ' + data.error);
-                }
-            } catch (error) {
-                alert('Connection error: ' + error.message);
-            }
-        }
-
-        async function randomize() {
-            try {
-                const response = await fetch('/api/traffic/lights/randomize', { method: 'POST' });
-                const data = await response.json();
-                if (data.success) {
-                    alert('Lights randomized for testing!');
-                    setTimeout(updateStatus, 1000);
-                } else {
-                    alert('Randomize failed: ' + data.error);
-                }
-            } catch (error) {
-                alert('Connection error: ' + error.message);
-            }
-        }
-
-        async function restore() {
-            try {
-                const response = await fetch('/api/traffic/restore', { method: 'POST' });
-                const data = await response.json();
-                if (data.success) {
-                    alert('System restored to normal operation!');
-                    setTimeout(updateStatus, 1000);
-                } else {
-                    alert('Restore failed: ' + data.error);
-                }
-            } catch (error) {
-                alert('Connection error: ' + error.message);
-            }
-        }
-        
-        // Update status every 2 seconds
-        setInterval(updateStatus, 2000);
-        updateStatus(); // Initial load
-    </script>
-</body>
-</html>
-    """
-    return render_template_string(dashboard_html)
+    """Web-based control dashboard (pre-rendered, gzip-cached)"""
+    headers = {
+        'ETag': _DASHBOARD_ETAG,
+        'Cache-Control': 'public, max-age=3600',
+        'Vary': 'Accept-Encoding'
+    }
+    if request.headers.get('If-None-Match') == _DASHBOARD_ETAG:
+        return Response(status=304, headers=headers)
+    headers['Content-Type'] = 'text/html; charset=utf-8'
+    if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        headers['Content-Encoding'] = 'gzip'
+        return Response(_DASHBOARD_GZ, headers=headers)
+    return Response(_DASHBOARD_MIN, headers=headers)
+
+# The index payload never changes, so serialize it once at import.
+_INDEX_BODY = json_dumps_bytes({
+    "api": "Unity Traffic System Control API",
+    "version": "2.0",
+    "description": "Cybersecurity-focused traffic system with attack simulation capabilities",
+    "dashboard": "http://localhost:5000/dashboard",
+    "endpoints": [
+        "GET /api/status - Get system status",
+        "GET /api/traffic/lights - Get all traffic lights status",
+        "GET /api/traffic/lights/list - Get light IDs only",
+        "POST /api/traffic/lights/<id>/set - Set traffic light status",
+        "POST /api/traffic/lights/<id>/mode - Set control mode",
+        "POST /api/traffic/lights/bulk/mode - Set all lights mode",
+        "POST /api/traffic/lights/set_all_red - Emergency stop",
+        "POST /api/traffic/lights/set_all_green - Clear all intersections",
+        "POST /api/traffic/lights/randomize - Randomize for testing",
+        "POST /api/traffic/attack/chaos - Simulate cyber attacks",
+        "POST /api/traffic/restore - Restore normal operation",
+        "GET /api/vehicles - Get all vehicle positions",
+        "GET /dashboard - Web control interface"
+    ]
+})
 
 @app.route('/', methods=['GET'])
 def index():
     """API documentation"""
-    return jsonify({
-        "api": "Unity Traffic System Control API",
-        "version": "2.0",
-        "description": "Cybersecurity-focused traffic system with attack simulation capabilities",
-        "dashboard": "http://localhost:5000/dashboard",
-        "endpoints": [
-            "GET /api/status - Get system status",
-            "GET /api/traffic/lights - Get all traffic lights status",
-            "GET /api/traffic/lights/list - Get light IDs only",
-            "POST /api/traffic/lights/<id>/set - Set traffic light status",
-            "POST /api/traffic/lights/<id>/mode - Set control mode",
-            "POST /api/traffic/lights/bulk/mode - Set all lights mode",
-            "POST /api/traffic/lights/set_all_red - Emergency stop",
-            "POST /api/traffic/lights/set_all_green - Clear all intersections",
-            "POST /api/traffic/lights/randomize - Randomize for testing",
-            "POST /api/traffic/attack/chaos - Simulate cyber attacks",
-            "POST /api/traffic/restore - Restore normal operation",
-            "GET /api/vehicles - Get all vehicle positions",
-            "GET /dashboard - Web control interface"
-        ]
-    })
+    return Response(_INDEX_BODY, mimetype='application/json')
+
+_COMPRESS_MIN_SIZE = 500
+
+@app.after_request
+def _gzip_json_response(response):
+    """gzip JSON responses for clients that accept it
+
+    Level 1 keeps the CPU cost low while still shrinking JSON payloads
+    (lights/vehicles arrays) by the bulk of their size. Streaming
+    responses (the SSE feed), small bodies, and anything already
+    encoded pass through untouched.
+    """
+    if (response.status_code != 200
+            or response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    body = response.get_data()
+    if len(body) < _COMPRESS_MIN_SIZE:
+        return response
+    compressed = gzip.compress(body, compresslevel=1)
+    if len(compressed) < len(body):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 if __name__ == '__main__':
     print("Starting Unity Traffic System API...")
     print(f"API Documentation: http://localhost:5000/")
     print(f"Control Dashboard: http://localhost:5000/dashboard")
     print(f"Status File: {STATUS_FILE_PATH}")
-    print(f"Command Directory: {COMMANDS_DIR}")
-    print("Ready for cybersecurity demonstrations!")
+    print(f"Command Log: {COMMANDS_LOG}")
     print("")
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if os.name == 'nt':
+        # gevent's monkey patching is unreliable on Windows (subprocess
+        # and parts of the stdlib); waitress gives threaded concurrency
+        # without it, and the GIL releases during the file I/O anyway.
+        try:
+            from waitress import serve
+        except ImportError:
+            serve = None
+        if serve is not None:
+            print("Serving with waitress (16 threads)")
+            serve(app, host='0.0.0.0', port=5000, threads=16)
+        else:
+            print("waitress not installed; falling back to the dev server")
+            app.run(host='0.0.0.0', port=5000, threaded=True)
+    else:
+        print("Dev server only - for production use:")
+        print("  gunicorn -c gunicorn.conf.py wsgi:app")
+        app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
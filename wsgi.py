@@ -0,0 +1,11 @@
+"""WSGI entry point for production serving.
+
+gevent's monkey patching must run before anything else is imported, so
+this module exists solely to patch first and then expose the app:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from gevent import monkey
+monkey.patch_all()
+
+from traffic_api import app  # noqa: E402,F401